@@ -1,21 +1,65 @@
+import json
+import os
 import sys
-from copy import deepcopy
-from dataclasses import dataclass, field, asdict
-from typing import Any, Dict, List, Optional, Set
+from copy import copy, deepcopy
+from dataclasses import dataclass, field, fields
+from functools import lru_cache, partial
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Set, Tuple
 import yaml
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if sys.version_info >= (3, 10):
+    # Slotted configs skip the per-instance __dict__, halving instance size
+    # and speeding attribute access for the many transient instances built
+    # during sweeps
+    dataclass = partial(dataclass, slots=True)
+
+# Use the libyaml-backed loader when available (several times faster than the
+# pure python SafeLoader, identical output)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Shared immutable default for kwargs-style fields; sweeps rebuild configs
+# constantly and a fresh dict per instance would allocate thousands of
+# tiny dicts, so the default_factory hands out this singleton instead
+_EMPTY_DICT = MappingProxyType({})
+
 @dataclass
 class ConfigClass:
+    @classmethod
+    def field_names(cls) -> Tuple[str, ...]:
+        "Field names for this config class, reflected once and stored on the class"
+        names = cls.__dict__.get("_field_names")
+        if names is None:
+            names = tuple(f.name for f in fields(cls))
+            cls._field_names = names
+        return names
+
     @classmethod
     def from_dict(cls, cfg : Dict[str, Any]):
         return cls(**cfg)
 
     def to_dict(self):
-        return asdict(self)
-    
+        # Shallow serialization: avoids the deep copy that dataclasses.asdict
+        # does on every call, recursing only into nested configs
+        data = {}
+        for name in type(self).field_names():
+            v = getattr(self, name)
+            if isinstance(v, ConfigClass):
+                v = v.to_dict()
+            elif isinstance(v, MappingProxyType):
+                v = dict(v)
+            data[name] = v
+        return data
+
 
 # specifies a dictionary of method configs
 _METHODS: Dict[str, Any] = {}  # registry
+_MODULE = sys.modules[__name__]
 
 
 def register_method(name):
@@ -25,8 +69,10 @@ def register_method(name):
     """
 
     def register_class(cls, name):
+        # Normalize once at decoration time so lookups are a single dict hit
+        cls._registered_name = name
         _METHODS[name] = cls
-        setattr(sys.modules[__name__], name, cls)
+        setattr(_MODULE, name, cls)
         return cls
 
     if isinstance(name, str):
@@ -34,13 +80,14 @@ def register_method(name):
         return lambda c: register_class(c, name)
 
     cls = name
-    name = cls.__name__
-    register_class(cls, name.lower())
+    register_class(cls, cls.__name__.lower())
 
     return cls
 
-@dataclass
+# register_method goes on top: with slots the dataclass decorator returns a
+# new class, which is the one that must land in the registry
 @register_method
+@dataclass
 class MethodConfig(ConfigClass):
     """
     Config for a certain RL method.
@@ -55,10 +102,9 @@ def get_method(name: str) -> MethodConfig:
     """
     Return constructor for specified method config
     """
-    name = name.lower()
-    if name in _METHODS:
-        return _METHODS[name]
-    else:
+    try:
+        return _METHODS[name.lower()]
+    except KeyError:
         raise Exception("Error: Trying to access a method that has not been registered")
    
 @register_method("DDPO")
@@ -192,7 +238,7 @@ class OptimizerConfig(ConfigClass):
     """
 
     name: str = None
-    kwargs: Dict[str, Any] = field(default_factory=dict)
+    kwargs: Dict[str, Any] = field(default_factory=lambda: _EMPTY_DICT)
 
 
 @dataclass
@@ -208,7 +254,7 @@ class SchedulerConfig(ConfigClass):
     """
 
     name: str = None
-    kwargs: Dict[str, Any] = field(default_factory=dict)
+    kwargs: Dict[str, Any] = field(default_factory=lambda: _EMPTY_DICT)
 
 
 @dataclass
@@ -239,6 +285,12 @@ class ModelConfig(ConfigClass):
 
     :param lora_rank: Rank of LoRA matrix
     :type lora_rank: int
+
+    :param vae_decode_chunk: Decode latents through the VAE in mini-batches of this size to bound decoder memory. Set to None to decode the full batch at once.
+    :type vae_decode_chunk: int
+
+    :param frozen_fp16: Cast the frozen VAE and text encoder to float16. Halves their memory bandwidth on tensor-core GPUs; leave off when decoding on CPU.
+    :type frozen_fp16: bool
     """
 
     model_path: str = None
@@ -246,9 +298,11 @@ class ModelConfig(ConfigClass):
     use_safetensors : bool = False
     local_model : bool = False
     attention_slicing: bool = False
-    xformers_memory_efficient: bool = False 
+    xformers_memory_efficient: bool = False
     gradient_checkpointing: bool = False
     lora_rank: int = None
+    vae_decode_chunk: int = 4
+    frozen_fp16: bool = False
 
 
 
@@ -261,9 +315,21 @@ class SamplerConfig(ConfigClass):
     postprocess : bool = False # If true, post processes latents to images (uint8 np arrays)
     img_size : int = 512
 
+@lru_cache(maxsize = 32)
+def _load_yaml_cached(path : str, mtime : float) -> Dict[str, Any]:
+    with open(path, mode = 'r') as file:
+        return yaml.load(file, Loader = _YAML_LOADER)
+
+def _read_yaml(yml_fp : str) -> Dict[str, Any]:
+    """
+    Parse a yaml file, caching by (path, mtime) so config discovery and
+    instantiation don't parse the same file twice. Returns a deep copy so
+    callers remain free to mutate the result.
+    """
+    return deepcopy(_load_yaml_cached(yml_fp, os.path.getmtime(yml_fp)))
+
 def load_yaml(yml_fp : str) -> Dict[str, ConfigClass]:
-    with open(yml_fp, mode = 'r') as file:
-        config = yaml.safe_load(file)
+    config = _read_yaml(yml_fp)
     d = {}
     if config["model"]:
         d["model"] = ModelConfig.from_dict(config["model"])
@@ -275,15 +341,74 @@ def load_yaml(yml_fp : str) -> Dict[str, ConfigClass]:
     return d
 
 
+def _freeze(v):
+    "Convert nested dicts/lists into hashable tuples so config dicts can key a cache"
+    if isinstance(v, dict):
+        return ("__dict__", tuple(sorted((k, _freeze(x)) for k, x in v.items())))
+    if isinstance(v, list):
+        return ("__list__", tuple(_freeze(x) for x in v))
+    return v
+
+def _thaw(v):
+    "Inverse of _freeze"
+    if isinstance(v, tuple) and len(v) == 2:
+        tag, items = v
+        if tag == "__dict__":
+            return {k : _thaw(x) for k, x in items}
+        if tag == "__list__":
+            return [_thaw(x) for x in items]
+    return v
+
+@lru_cache(maxsize = 128)
+def _build_config(cls, frozen_cfg):
+    return cls(**{k : _thaw(v) for k, v in frozen_cfg})
+
+def _copy_config(inst):
+    """
+    Copy a config instance along with its mutable field values, so callers
+    never share state with the construction cache. Containers are deep-copied
+    since values like kwargs can nest lists/dicts (e.g. optimizer betas).
+    """
+    new = copy(inst)
+    for name in type(inst).field_names():
+        v = getattr(new, name)
+        if isinstance(v, (dict, list)):
+            setattr(new, name, deepcopy(v))
+    return new
+
+def _from_dict_cached(cls, cfg : Dict[str, Any]):
+    """
+    Construct a sub-config from a dict, memoizing by content. Hyperparameter
+    sweeps rebuild byte-identical sub-configs repeatedly; this makes repeat
+    construction a single cache lookup. Returns a per-call copy so mutating
+    one config never leaks into others built from the same dict. Falls back
+    to a plain from_dict when the dict contains unhashable values.
+    """
+    try:
+        frozen = tuple(sorted((k, _freeze(v)) for k, v in cfg.items()))
+        inst = _build_config(cls, frozen)
+    except TypeError:
+        return cls.from_dict(cfg)
+    return _copy_config(inst)
+
+def _as(cls, v):
+    "Pass a value through if it is already a materialized config instance"
+    return v if isinstance(v, cls) else _from_dict_cached(cls, v)
+
 def merge(base: Dict, update: Dict, updated: Set) -> Dict:
-    "Recursively updates a nested dictionary with new values"
-    for k, v in base.items():
-        if k in update and isinstance(v, dict):
-            base[k] = merge(v, update[k], updated)
-            updated.add(k)
-        elif k in update:
-            base[k] = update[k]
-            updated.add(k)
+    "Updates a nested dictionary with new values using an iterative work stack"
+    # Iterating over update (usually tiny) rather than base avoids walking
+    # untouched parts of the config, and the explicit stack avoids recursion
+    stack = [(base, update)]
+    while stack:
+        b, u = stack.pop()
+        for k, v in u.items():
+            if k in b and isinstance(b[k], dict) and isinstance(v, dict):
+                stack.append((b[k], v))
+                updated.add(k)
+            elif k in b:
+                b[k] = v
+                updated.add(k)
 
     return base
 
@@ -327,43 +452,97 @@ class DRLXConfig(ConfigClass):
         :param yml_fp: Path to yaml file
         :type yml_fp: str
         """
-        with open(yml_fp, mode="r") as file:
-            config = yaml.safe_load(file)
-        return cls.from_dict(config)
+        return cls.from_dict(_read_yaml(yml_fp))
 
     def to_dict(self):
         """
-        Convert TRLConfig to dictionary.
+        Convert DRLXConfig to dictionary.
         """
-        data = {
-            "method": self.method.__dict__,
-            "model": self.model.__dict__,
-            "sampler": self.sampler.__dict__,
-            "optimizer": self.optimizer.__dict__,
-            "scheduler": self.scheduler.__dict__,
-            "train": self.train.__dict__,
-            "logging": self.logging.__dict__
+        return {
+            "method": self.method.to_dict(),
+            "model": self.model.to_dict(),
+            "sampler": self.sampler.to_dict(),
+            "optimizer": self.optimizer.to_dict(),
+            "scheduler": self.scheduler.to_dict(),
+            "train": self.train.to_dict(),
+            "logging": self.logging.to_dict()
         }
 
-        return data
-
     @classmethod
     def from_dict(cls, config: Dict):
         """
         Convert dictionary to DRLXConfig.
         """
+        method = config["method"]
+        if not isinstance(method, MethodConfig):
+            method = get_method(method["name"]).from_dict(method)
+
         return cls(
-            method=get_method(config["method"]["name"]).from_dict(config["method"]),
-            model=ModelConfig.from_dict(config["model"]),
-            sampler=SamplerConfig.from_dict(config["sampler"]),
-            optimizer=OptimizerConfig.from_dict(config["optimizer"]),
-            scheduler=SchedulerConfig.from_dict(config["scheduler"]),
-            train=TrainConfig.from_dict(config["train"]),
-            logging=LoggingConfig.from_dict(config["logging"]),
+            method=method,
+            model=_as(ModelConfig, config["model"]),
+            sampler=_as(SamplerConfig, config["sampler"]),
+            optimizer=_as(OptimizerConfig, config["optimizer"]),
+            scheduler=_as(SchedulerConfig, config["scheduler"]),
+            train=_as(TrainConfig, config["train"]),
+            logging=_as(LoggingConfig, config["logging"]),
         )
 
+    def apply_updates(self, flat_updates: Dict[str, Any]):
+        """
+        Apply flat dotted-key overrides (e.g. {"train.batch_size": 8}) directly
+        to this config, skipping the dict round trip through from_dict.
+
+        :param flat_updates: Mapping of dotted attribute paths to new values
+        :type flat_updates: Dict[str, Any]
+        """
+        copied = set()
+        for name, value in flat_updates.items():
+            *layers, attr = name.split(".")
+            target = self
+            for layer in layers:
+                # A path segment can land on a sub-config or on a plain dict
+                # field (e.g. optimizer.kwargs.lr)
+                if isinstance(target, ConfigClass):
+                    if not hasattr(target, layer):
+                        raise ValueError(f"parameter {name} is not present in the config (typo or a wrong config)")
+                    sub = getattr(target, layer)
+                elif isinstance(target, dict) and layer in target:
+                    sub = target[layer]
+                else:
+                    raise ValueError(f"parameter {name} is not present in the config (typo or a wrong config)")
+                if id(sub) not in copied:
+                    # Sub-configs and dicts may be shared through the
+                    # from_dict cache or the base config, so copy before
+                    # mutating
+                    if isinstance(sub, ConfigClass):
+                        sub = copy(sub)
+                    elif isinstance(sub, (dict, MappingProxyType)):
+                        sub = dict(sub)
+                    else:
+                        raise ValueError(f"parameter {name} is not present in the config (typo or a wrong config)")
+                    if isinstance(target, ConfigClass):
+                        setattr(target, layer, sub)
+                    else:
+                        target[layer] = sub
+                    copied.add(id(sub))
+                target = sub
+            if isinstance(target, ConfigClass):
+                if not hasattr(target, attr):
+                    raise ValueError(f"parameter {name} is not present in the config (typo or a wrong config)")
+                setattr(target, attr, value)
+            elif isinstance(target, dict) and attr in target:
+                target[attr] = value
+            else:
+                raise ValueError(f"parameter {name} is not present in the config (typo or a wrong config)")
+        return self
+
     @classmethod
     def update(cls, baseconfig: Dict, config: Dict):
+        # When the base is already materialized and the overrides are flat,
+        # patch attributes directly instead of rebuilding every sub-config
+        if isinstance(baseconfig, cls) and not any(isinstance(v, dict) for v in config.values()):
+            return copy(baseconfig).apply_updates(config)
+
         update = {}
         # unflatten a string variable name into a nested dictionary
         # key1.key2.key3: value -> {key1: {key2: {key3: value}}}
@@ -381,6 +560,11 @@ class DRLXConfig(ConfigClass):
         if not isinstance(baseconfig, Dict):
             baseconfig = baseconfig.to_dict()
 
+        # to_dict hands out live references to dict-valued fields and merge
+        # works in place, so copy before merging to leave the caller's
+        # config untouched
+        baseconfig = deepcopy(baseconfig)
+
         updates = set()
         merged = merge(baseconfig, update, updates)
 
@@ -392,6 +576,6 @@ class DRLXConfig(ConfigClass):
 
     def __str__(self):
         """Returns a human-readable string representation of the config."""
-        import json
-
+        if orjson is not None:
+            return orjson.dumps(self.to_dict(), option = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode()
         return json.dumps(self.to_dict(), indent=4)
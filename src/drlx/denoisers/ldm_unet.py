@@ -1,8 +1,9 @@
 from torchtyping import TensorType
 from typing import Iterable, Union, Callable, Type, Tuple
 
+from collections import OrderedDict
+
 import torch
-import numpy as np
 from diffusers import UNet2DConditionModel, DDIMScheduler
 
 from drlx.denoisers import BaseConditionalDenoiser
@@ -11,6 +12,14 @@ from drlx.sampling import Sampler
 
 from peft import LoraConfig
 
+# Bound on cached text encoder outputs (see LDMUNet.forward)
+TEXT_EMBED_CACHE_SIZE = 64
+
+# Inverse of the SD VAE latent scaling factor, used in postprocess. Python
+# float scalars bind to ops on any device, unlike buffers pinned to the
+# module's device
+VAE_INV_SCALE = 1.0 / 0.18215
+
 class LDMUNet(BaseConditionalDenoiser):
     """
     Class for Latent Diffusion Model UNet denoiser. Can optionally pass sampler information, though it is not required. Generally used in tandem with a diffusers pipeline.
@@ -37,6 +46,15 @@ class LDMUNet(BaseConditionalDenoiser):
 
         self.scale_factor = None
 
+        # DDPO runs several inner epochs over the same prompts, so identical
+        # token batches hit the frozen text encoder repeatedly; memoize its
+        # outputs with a small LRU
+        self._text_embed_cache = OrderedDict()
+
+        # Token ids per prompt; prompt sets are fixed across epochs so
+        # tokenization cost is amortized to O(unique prompts)
+        self._tok_cache = {}
+
     def get_input_shape(self) -> Tuple[int]:
         """
         Figure out latent noise input shape for the UNet. Requires that unet and vae are defined
@@ -80,6 +98,15 @@ class LDMUNet(BaseConditionalDenoiser):
         self.vae.requires_grad_(False)
         self.unet.requires_grad_(not self.config.lora_rank)
 
+        if self.config.frozen_fp16:
+            # Frozen modules are inference-only, so run them in half precision
+            self.text_encoder = self.text_encoder.to(dtype = torch.float16)
+            self.vae = self.vae.to(dtype = torch.float16)
+
+        # Channels-last keeps decoded images physically NHWC, making the
+        # permute in postprocess a zero-copy view
+        self.vae = self.vae.to(memory_format = torch.channels_last)
+
         self.tokenizer = pipe.tokenizer
         self.scheduler = DDIMScheduler.from_config(pipe.scheduler.config)
 
@@ -116,14 +143,28 @@ class LDMUNet(BaseConditionalDenoiser):
         """
 
         if mode == "tokens":
-            tok_out = self.tokenizer(
-                text,
-                padding = 'max_length',
-                max_length = self.tokenizer.model_max_length,
-                truncation = True,
-                return_tensors = "pt"
-            )
-            return tok_out.input_ids, tok_out.attention_mask
+            # A bare string is a single prompt, not an iterable of
+            # one-character prompts
+            if isinstance(text, str):
+                text = [text]
+            else:
+                text = list(text)
+            missing = list(dict.fromkeys(t for t in text if t not in self._tok_cache))
+            if missing:
+                tok_out = self.tokenizer(
+                    missing,
+                    padding = 'max_length',
+                    max_length = self.tokenizer.model_max_length,
+                    truncation = True,
+                    return_tensors = "np"
+                )
+                ids = torch.from_numpy(tok_out.input_ids).long()
+                mask = torch.from_numpy(tok_out.attention_mask).long()
+                for i, t in enumerate(missing):
+                    self._tok_cache[t] = (ids[i], mask[i])
+            input_ids = torch.stack([self._tok_cache[t][0] for t in text])
+            attention_mask = torch.stack([self._tok_cache[t][1] for t in text])
+            return input_ids, attention_mask
         elif mode == "embeds":
             return self.encode_prompt(text, **embed_kwargs)
         else: 
@@ -136,12 +177,33 @@ class LDMUNet(BaseConditionalDenoiser):
         """
         if vae_device is not None:
             self.vae = self.vae.to(vae_device)
-            output = output.to(vae_device)
-        images = self.vae.decode(1 / 0.18215 * output).sample
-        images = (images / 2 + 0.5).clamp(0, 1)
-        images = images.detach().cpu().permute(0,2,3,1).numpy()
-        images = (images * 255).round().astype(np.uint8)
-        return images
+        # Bind hot attributes to locals once; nn.Module attribute access walks
+        # _parameters/_buffers/_modules on every lookup
+        vae = self.vae
+        scale = VAE_INV_SCALE
+        batch = output.shape[0]
+        # Decoder activations dominate memory at 512px, so decode in
+        # mini-batches rather than pushing the whole batch through at once
+        chunk = self.config.vae_decode_chunk or batch
+        out_chunks = []
+        for i in range(0, batch, chunk):
+            view = output[i : i + chunk]
+            sub = view.to(device = vae.device, dtype = vae.dtype, non_blocking = True)
+            # Match the decoder's channels-last layout so its output stays NHWC
+            sub = sub.contiguous(memory_format = torch.channels_last)
+            if sub is view:
+                # Same device: scale out of place so the caller's latents are untouched
+                sub = view * scale
+            else:
+                # The device transfer already made a private copy; fold the VAE
+                # scale into it in place instead of allocating a second tensor
+                sub.mul_(scale)
+            images = vae.decode(sub).sample
+            # Normalize, quantize and permute on device so the device -> host
+            # copy moves uint8 (1 byte/channel) instead of float32 (4 bytes/channel)
+            images = images.mul_(0.5).add_(0.5).clamp_(0, 1).mul_(255).round_().to(torch.uint8)
+            out_chunks.append(images.permute(0, 2, 3, 1).contiguous().cpu())
+        return torch.cat(out_chunks, dim = 0).numpy()
 
     def forward(
             self,
@@ -155,11 +217,38 @@ class LDMUNet(BaseConditionalDenoiser):
         For text conditioned UNET, inputs are assumed to be:
         pixel_values, input_ids, attention_mask, time_step
         """
-        with torch.no_grad():
+        # Bind hot attributes to locals once per call (nn.Module __getattr__ is
+        # a multi-dict traversal)
+        unet = self.unet
+        if text_embeds is None:
+            cache = self._text_embed_cache
+            key = (
+                input_ids.shape,
+                str(input_ids.device),
+                input_ids.cpu().numpy().tobytes(),
+                attention_mask.cpu().numpy().tobytes() if attention_mask is not None else None
+            )
+            text_embeds = cache.get(key)
             if text_embeds is None:
-                text_embeds = self.text_encoder(input_ids, attention_mask)[0]
-
-        return self.unet(
+                with torch.inference_mode():
+                    text_embeds = self.text_encoder(input_ids, attention_mask)[0]
+                # Copy outside inference mode so autograd can save the
+                # embeddings for the UNet backward pass, matching the UNet
+                # dtype in case the encoder runs in half precision
+                text_embeds = text_embeds.to(dtype = unet.dtype, copy = True)
+                cache[key] = text_embeds
+                if len(cache) > TEXT_EMBED_CACHE_SIZE:
+                    cache.popitem(last = False)
+            else:
+                cache.move_to_end(key)
+
+        # Embeddings that come in via encode_prompt carry the text encoder's
+        # dtype, which is fp16 under frozen_fp16; match the UNet before
+        # cross attention
+        if text_embeds.dtype != unet.dtype:
+            text_embeds = text_embeds.to(unet.dtype)
+
+        return unet(
             pixel_values,
             time_step,
             encoder_hidden_states = text_embeds
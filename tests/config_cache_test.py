@@ -0,0 +1,35 @@
+"""
+This script tests that the config construction cache never leaks shared
+mutable state between configs built from the same yaml
+"""
+
+from drlx.configs import DRLXConfig
+
+config_path = "configs/ddpo_sd_imagenet.yml"
+
+# Mutating a nested container (optimizer betas) in one loaded config must not
+# show up in later loads of the same file
+c = DRLXConfig.load_yaml(config_path)
+orig_betas = list(c.optimizer.kwargs["betas"])
+c.optimizer.kwargs["betas"][0] = 0.12345
+
+fresh = DRLXConfig.load_yaml(config_path)
+assert fresh.optimizer.kwargs["betas"] == orig_betas, fresh.optimizer.kwargs["betas"]
+
+# Same through update: neither path may poison the cache or the base config
+base = DRLXConfig.load_yaml(config_path)
+orig_lr = base.optimizer.kwargs["lr"]
+
+updated = DRLXConfig.update(base, {"optimizer": {"kwargs": {"lr": 123.0}}})
+assert updated.optimizer.kwargs["lr"] == 123.0
+assert base.optimizer.kwargs["lr"] == orig_lr
+
+updated = DRLXConfig.update(base, {"optimizer.kwargs.lr": 456.0})
+assert updated.optimizer.kwargs["lr"] == 456.0
+assert base.optimizer.kwargs["lr"] == orig_lr
+
+fresh = DRLXConfig.load_yaml(config_path)
+assert fresh.optimizer.kwargs["lr"] == orig_lr
+assert fresh.optimizer.kwargs["betas"] == orig_betas
+
+print("Config cache isolation tests passed")